@@ -28,80 +28,415 @@ Format: OriginalName_YYYYMMDD_AiCaption.ext
 import os
 import sys
 import argparse
+import contextlib
+import itertools
+import json
 import re
+import shutil
+import subprocess
+import tempfile
 import string
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
-from hachoir.parser import createParser
-from hachoir.metadata import extractMetadata
-import cv2
-from PIL import Image
-import torch
-from transformers import BlipProcessor, BlipForConditionalGeneration
+from typing import TYPE_CHECKING, Optional, Dict, Iterator, List, TextIO, Tuple
+
+# The video, image and AI libraries take seconds to import, so they are only
+# imported by the functions that use them. This way options like --version or
+# runs where every file is skipped don't pay for them.
+if TYPE_CHECKING:
+    from PIL import Image
 
 MODEL_NAME = "Salesforce/blip-image-captioning-base"
 TOKENS_TO_SKIP = {
     'a', 'an', 'the', 'in', 'on', 'at', 'of', 'and', 'or', 'is',
     'are', 'was', 'were', 'with', 'to', 'for', 'around', 'that',
 }
-VIDEO_EXTENSIONS = {
+VIDEO_EXTENSIONS = frozenset({
     '.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv',
     '.m4v', '.mpg', '.mpeg', '.3gp', '.webm'
-}
+})
+DEFAULT_BATCH_SIZE = 8
 PROGRAM_NAME = "AI Video Renamer"
 PROGRAM_VERSION = "v1.1.0"
 PROGRAM_COPYRIGHT = "Copyright (C) 2025 Stephen Bonar"
 
+# Matches a stem already renamed to YYYYMMDD_Caption_OriginalFileName. Compiled
+# once so directory scans don't go through the re module cache for every file.
+_RENAMED_RE = re.compile(r'\d{8}_[A-Z][a-zA-Z0-9]*_.+')
+
+# Translation table that deletes punctuation from captions.
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+# Seconds to wait for ffprobe before giving up on a file, so a hung ffprobe
+# can't stall the thread pool.
+FFPROBE_TIMEOUT = 30
+
+# Width and height of the images the BLIP model is trained on.
+FRAME_SIZE = 384
+
+# Directory where models prepared for a device are cached between runs.
+MODEL_CACHE_DIR = Path.home() / ".cache" / "aivideorename"
 
-def extract_creation_date(path: str) -> Optional[str]:
+# Loaded (processor, model) pairs keyed by (use_online, device).
+_MODEL_CACHE: dict = {}
+
+# Keys of the models in _MODEL_CACHE that have been compiled.
+_COMPILED_MODELS: set = set()
+
+# Compiling the model takes tens of seconds on the first batch, which only
+# pays for itself when there are many videos to caption in the same run.
+COMPILE_MIN_VIDEOS = 256
+
+
+class FileLog:
+    """
+    Collects the messages for a single video file so they can be written out
+    together, keeping output from files processed in parallel from mixing.
+    """
+
+    def __init__(self):
+        self.lines: List[Tuple[TextIO, str]] = []
+
+    def info(self, message: str) -> None:
+        """Add a message to be written to stdout."""
+        self.lines.append((sys.stdout, message))
+
+    def error(self, message: str) -> None:
+        """Add a message to be written to stderr."""
+        self.lines.append((sys.stderr, message))
+
+    def flush(self) -> None:
+        """Write out the collected messages, one write per output stream."""
+        for stream, lines in itertools.groupby(
+            self.lines, key=lambda entry: entry[0]
+        ):
+            stream.write("\n".join(message for _, message in lines) + "\n")
+        self.lines.clear()
+
+
+def _ffprobe_creation_date(path: str, log: FileLog) -> Optional[datetime]:
+    """
+    Extract creation date from video metadata using ffprobe, if installed.
+
+    Args:
+        path: Path to the video file
+        log: Log to add messages for the file to
+
+    Returns:
+        Creation date, or None if ffprobe is unavailable or finds no date
+    """
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+
+    try:
+        result = subprocess.run(
+            [
+                ffprobe, "-v", "quiet", "-print_format", "json",
+                "-show_format", path,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=FFPROBE_TIMEOUT,
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        log.error(f"Error running ffprobe on {path}: {e}")
+        return None
+
+    # ffprobe fails on files it can't parse, which just means there is no date
+    # to be found, the same as when the tag is missing or isn't a valid date.
+    if result.returncode != 0:
+        return None
+
+    try:
+        tags = json.loads(result.stdout).get("format", {}).get("tags", {})
+
+        # Tag names vary in case between containers, e.g. CREATION_TIME in MKV.
+        for key, value in tags.items():
+            if key.lower() == "creation_time":
+                # Only the date part is needed, e.g. 2025-01-31T12:00:00Z.
+                return datetime.strptime(value[:10], '%Y-%m-%d')
+    except (ValueError, TypeError, AttributeError):
+        pass
+
+    return None
+
+
+def extract_creation_date(path: str, log: FileLog) -> Optional[str]:
     """
     Extract creation date from video metadata using hachoir.
 
+    Falls back to ffprobe for files hachoir can't parse or finds no date in.
+
     Args:
         path: Path to the video file
+        log: Log to add messages for the file to
 
     Returns:
         Date string in YYYYMMDD format, or None if not found
     """
+    from hachoir.parser import createParser
+    from hachoir.metadata import extractMetadata
+
+    date = None
+    error = None
     try:
         # Create a hachoir parser for the video file so we can extract metadata.
         parser = createParser(path)
         if not parser:
             raise Exception("Unable to parse file")
-        
-        metadata = extractMetadata(parser)
+
+        # Close the file as soon as the metadata has been read from it.
+        with parser:
+            metadata = extractMetadata(parser)
+
         if metadata:
             # Unlike photos, videos don't have date taken, so we use creation
             # date or date instead.
             date = metadata.get('creation_date') or metadata.get('date')
+    except Exception as e:
+        error = e
 
-            if date:
-                return date.strftime('%Y%m%d')
-            else:
-                print(
-                    f"{path} does not contain date, skipping", file=sys.stderr
-                )
-                return None
+    if not date:
+        date = _ffprobe_creation_date(path, log)
+
+    if date:
+        return date.strftime('%Y%m%d')
+
+    if error:
+        log.error(f"Error extracting date from {path}: {error}")
+    else:
+        log.error(f"{path} does not contain date, skipping")
+    return None
+
+
+def _model_cache_path(device: str) -> Path:
+    """
+    Get the path of the prepared model cache file for a device.
+
+    The torch and transformers versions are part of the name, so a file saved
+    by other library versions is never loaded.
+
+    Args:
+        device: Device the model runs on ("cuda" or "cpu")
+
+    Returns:
+        Path to the cache file
+    """
+    import torch
+    import transformers
+
+    return MODEL_CACHE_DIR / (
+        f"{MODEL_NAME.replace('/', '--')}-{device}"
+        f"-torch{torch.__version__}-transformers{transformers.__version__}.pt"
+    )
+
+
+def _remove_model_cache_files(device: str = "*", keep=None) -> None:
+    """
+    Remove cached model files, reporting any that can't be removed.
+
+    Args:
+        device: Device whose cache files to remove, or "*" for all devices
+        keep: Cache file to leave in place, if any
+    """
+    for cache_path in MODEL_CACHE_DIR.glob(
+        f"{MODEL_NAME.replace('/', '--')}-{device}-*.pt"
+    ):
+        if cache_path == keep:
+            continue
+
+        try:
+            cache_path.unlink()
+        except OSError as e:
+            print(
+                f"Error removing model cache {cache_path}: {e}",
+                file=sys.stderr,
+            )
+
+
+def clear_model_cache() -> None:
+    """Remove any prepared models cached by previous runs."""
+    _remove_model_cache_files()
+
+
+def _prepare_model(model, device: str):
+    """
+    Convert a BLIP model for fast inference on a device.
+
+    Args:
+        model: BLIP model in full precision
+        device: Device to move the model to ("cuda" or "cpu")
+
+    Returns:
+        Converted model
+    """
+    import torch
+
+    if device == "cuda":
+        # Half precision doubles throughput on GPUs with tensor cores and
+        # halves the memory used by the model.
+        return model.to(device, dtype=torch.float16)
+
+    # There is no fast half precision on most CPUs, so we quantize the linear
+    # layers to int8 instead to speed up inference.
+    return torch.ao.quantization.quantize_dynamic(
+        model.to(device), {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _load_model_cache(device: str):
+    """
+    Load a model prepared and cached by a previous run.
+
+    Args:
+        device: Device to load the model onto ("cuda" or "cpu")
+
+    Returns:
+        BLIP model converted for the device, or None if there is no cache
+    """
+    import torch
+    from transformers import BlipConfig, BlipForConditionalGeneration
+
+    cache_path = _model_cache_path(device)
+    if not cache_path.exists():
+        return None
+
+    try:
+        # The model is cached as its config and weights, so it can be loaded
+        # without unpickling any objects. The weights are loaded into a newly
+        # built model converted the same way as the cached one was.
+        cache = torch.load(cache_path, map_location=device, weights_only=True)
+        with torch.device(device):
+            model = BlipForConditionalGeneration(
+                BlipConfig.from_dict(cache["config"])
+            )
+        model = _prepare_model(model, device)
+        model.load_state_dict(cache["state_dict"])
     except Exception as e:
-        print(f"Error extracting date from {path}: {e}", file=sys.stderr)
+        print(f"Error loading model cache {cache_path}: {e}", file=sys.stderr)
         return None
 
+    model.eval()
+    return model
 
-def generate_ai_caption(
-    path: str, use_online: bool = False
-) -> Optional[str]:
+
+def _save_model_cache(device: str, model) -> None:
     """
-    Generate an AI caption for the video by inspecting a frame.
+    Cache a prepared model so later runs can load it quickly.
+
+    Cache files left behind by other library versions are removed once the
+    new one has been saved.
+
+    Args:
+        device: Device the model runs on ("cuda" or "cpu")
+        model: BLIP model to cache, converted for the device
+    """
+    import torch
+
+    cache = {
+        "config": model.config.to_dict(),
+        "state_dict": model.state_dict(),
+    }
+
+    cache_path = _model_cache_path(device)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first and move it into place, so an
+        # interrupted or concurrent run never leaves a partial cache behind.
+        fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                torch.save(cache, temp_file)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except Exception as e:
+        print(f"Error saving model cache {cache_path}: {e}", file=sys.stderr)
+        return
+
+    _remove_model_cache_files(device, keep=cache_path)
+
+
+def _get_model(use_online: bool, device: str, compile_model: bool = False):
+    """
+    Load the BLIP processor and model, reusing them across calls.
+
+    The model converted for the device is also cached on disk, so later runs
+    load it in one read instead of going through the Hugging Face hub and
+    converting it again.
 
     Args:
-        path: Path to the video file
         use_online: If True, load models from HuggingFace online;
             else use local files
+        device: Device to move the model to ("cuda" or "cpu")
+        compile_model: If True, compile the model for faster generation
 
     Returns:
-        AI-generated caption, or None if generation fails
+        Tuple of (processor, model)
+    """
+    from transformers import BlipProcessor, BlipForConditionalGeneration
+
+    key = (use_online, device)
+    if key not in _MODEL_CACHE:
+        # NOTE: On first run, take out the local_files_only=True to download
+        # the model. This will download to ~/.cache/huggingface
+        #
+        # Loads a pre-trained BLIP image captioning processor from the Hugging
+        # Face model hub.
+        processor = BlipProcessor.from_pretrained(
+            MODEL_NAME,
+            local_files_only=not use_online,
+            use_fast=True,
+        )
+
+        # Online mode is used to pick up the latest model from the hub, so the
+        # cache is rebuilt from it rather than loaded.
+        model = None if use_online else _load_model_cache(device)
+        if model is None:
+            # Loads a pre-trained BLIP image captioning model from the Hugging
+            # Face model hub and moves it to the selected device.
+            model = _prepare_model(
+                BlipForConditionalGeneration.from_pretrained(MODEL_NAME),
+                device,
+            )
+            model.eval()
+
+            _save_model_cache(device, model)
+
+        _MODEL_CACHE[key] = (processor, model)
+
+    # Compile the vision encoder and text decoder so generate runs fused
+    # kernels. The encoder always sees 384x384 frames, so it can also use CUDA
+    # graphs, while the decoder's sequence length grows every step. Modules are
+    # compiled in place so their state dict keys are unchanged. This happens
+    # after the model is cached as compiled modules can't be saved.
+    if compile_model and key not in _COMPILED_MODELS:
+        _, model = _MODEL_CACHE[key]
+        model.vision_model.compile(mode="reduce-overhead")
+        model.text_decoder.compile(dynamic=True)
+        _COMPILED_MODELS.add(key)
+
+    return _MODEL_CACHE[key]
+
+
+def read_first_frame(path: str, log: FileLog) -> Optional["Image.Image"]:
+    """
+    Read the first frame of a video so it can be captioned.
+
+    Args:
+        path: Path to the video file
+        log: Log to add messages for the file to
+
+    Returns:
+        First frame as an RGB PIL image, or None if it could not be read
     """
+    import cv2
+    from PIL import Image
+
     try:
         # Open the video file using OpenCV so we can read the first frame.
         capture = cv2.VideoCapture(path)
@@ -117,74 +452,182 @@ def generate_ai_caption(
         if not success or frame is None:
             raise Exception("Could not read frame from video")
 
+        # Shrink the frame to the size the model uses before doing anything
+        # else with it, as the processor would discard the extra resolution
+        # anyway and a full resolution frame can be many megabytes. Captions
+        # are only negligibly affected by resizing here as well as in the
+        # processor.
+        frame = cv2.resize(
+            frame, (FRAME_SIZE, FRAME_SIZE), interpolation=cv2.INTER_AREA
+        )
+
         # OpenCV uses BGR format so we need to convert it to RGB for PIL.
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
         # Now we convert to a PIL image so it can be captioned by the AI model.
-        pil_image = Image.fromarray(frame_rgb)
+        return Image.fromarray(frame_rgb)
+    except Exception as e:
+        log.error(f"Error generating caption for {path}: {e}")
+        return None
 
-        # Establishes the device to run the model on, either the GPU or CPU. GPU
-        # is preferred if available as GPUs are much faster for AI and learning. 
-        device = "cuda" if torch.cuda.is_available() else "cpu"
 
-        # NOTE: On first run, take out the local_files_only=True to download the
-        # model. This will download to ~/.cache/huggingface
-        #
-        # Loads a pre-trained BLIP image captioning processor from the Hugging
-        # Face model hub.
-        processor = BlipProcessor.from_pretrained(
-            MODEL_NAME,
-            local_files_only=not use_online,
-            use_fast=True,
-        )
+def generate_ai_captions(
+    images: List["Image.Image"],
+    use_online: bool = False,
+    compile_model: bool = False,
+) -> Optional[List[str]]:
+    """
+    Generate AI captions for a batch of frames in a single model pass.
 
-        # Loads a pre-trained BLIP image captioning model from the Hugging Face
-        # model hub and moves it to the selected device.
-        model = BlipForConditionalGeneration.from_pretrained(MODEL_NAME).to(
-            device
-        )
+    Args:
+        images: Frames to caption
+        use_online: If True, load models from HuggingFace online;
+            else use local files
+        compile_model: If True, compile the model when running on the GPU,
+            which is only worth it when captioning many batches
 
-        # Prepare the image for the model by preprocessing it and converting it
-        # into PyTorch tensors, then moving the tensors to the selected device.
-        tensors = processor(pil_image, return_tensors="pt").to(device)
+    Returns:
+        AI-generated captions in the same order as images, or None if
+        generation fails
+    """
+    import torch
+
+    # Establishes the device to run the model on, either the GPU or CPU. GPU
+    # is preferred if available as GPUs are much faster for AI and learning.
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    # Floating point type the model inputs are converted to for the device.
+    dtype = torch.float16 if device == "cuda" else torch.float32
+
+    # Only the GPU model is compiled, the CPU model is already quantized.
+    compile_model = (
+        compile_model
+        and device == "cuda"
+        and hasattr(torch.nn.Module, "compile")
+    )
+
+    # Compilation happens lazily on the first generate call, so errors from it
+    # surface there. Suppressing them makes the compiled modules fall back to
+    # eager mode instead of failing every caption. This is a process wide
+    # setting, so it is only turned on around our own generate call.
+    suppress_compile_errors = (
+        torch._dynamo.config.patch(suppress_errors=True)
+        if compile_model
+        else contextlib.nullcontext()
+    )
+
+    try:
+        # Obtain the processor and model, loading them only on the first call so
+        # directories of videos don't reload the model for every file.
+        processor, model = _get_model(use_online, device, compile_model)
+
+        # Prepare the images for the model by preprocessing them and converting
+        # them into a single batch of PyTorch tensors, then moving the tensors
+        # to the selected device and converting them to the model's precision.
+        tensors = processor(images=images, return_tensors="pt").to(
+            device, dtype
+        )
 
-        with torch.no_grad():
+        with suppress_compile_errors, torch.no_grad(), torch.autocast(
+            device_type=device, dtype=torch.float16, enabled=device == "cuda"
+        ):
             # Obtain the batch of token IDs from the model by unpacking the 
             # tensors and passing them as key-value pairs to the model's 
             # generate method so we can generate a caption from the token ids.
             token_id_batch = model.generate(**tensors)
 
-        # Obtains the full caption string by decoding the first set of token IDs
-        # in the batch (there is only 1 batch) and skipping any special tokens 
-        # like <pad> or <end>. This gives us a human-readable caption. That 
-        # said, we will want to clean up the caption in the following lines to
-        # make it more suitable for a filename.
-        caption = processor.decode(token_id_batch[0], skip_special_tokens=True)
+        # Obtains the full caption strings by decoding each set of token IDs in
+        # the batch and skipping any special tokens like <pad> or <end>. This
+        # gives us human-readable captions. That said, we will want to clean up
+        # the captions later to make them more suitable for a filename.
+        captions = processor.batch_decode(
+            token_id_batch, skip_special_tokens=True
+        )
 
-        return caption.lower()
+        return [caption.lower() for caption in captions]
     except Exception as e:
-        print(
-            f"Error generating caption for {path}: {e}",
-            file=sys.stderr,
-        )
+        print(f"Error generating captions: {e}", file=sys.stderr)
+        return None
+
+
+def generate_ai_caption(
+    path: str, log: FileLog, use_online: bool = False
+) -> Optional[str]:
+    """
+    Generate an AI caption for the video by inspecting a frame.
+
+    Args:
+        path: Path to the video file
+        log: Log to add messages for the file to
+        use_online: If True, load models from HuggingFace online;
+            else use local files
+
+    Returns:
+        AI-generated caption, or None if generation fails
+    """
+    pil_image = read_first_frame(path, log)
+    if pil_image is None:
         return None
 
+    captions = generate_ai_captions([pil_image], use_online=use_online)
+    if not captions:
+        return None
+
+    return captions[0]
+
+
+def to_pascal_case(full_caption: str) -> str:
+    """
+    Convert a caption to PascalCase, dropping punctuation and filler words.
+
+    Args:
+        full_caption: AI caption in lowercase
+
+    Returns:
+        Caption in PascalCase suitable for a filename
+    """
+    # Strip punctuation from the whole caption in one pass before splitting it
+    # into tokens, rather than translating each token separately.
+    caption_tokens = full_caption.translate(_PUNCTUATION_TABLE).split()
+    return ''.join(
+        token.capitalize()
+        for token in caption_tokens
+        if token not in TOKENS_TO_SKIP
+    )
+
+
+def split_extension(filename: str) -> Tuple[str, str]:
+    """
+    Split a filename into its stem and extension.
+
+    Gives the same result as Path.stem and Path.suffix without building a Path
+    for every file.
+
+    Args:
+        filename: Name of the file (without directory)
+
+    Returns:
+        Tuple of (stem, extension), where the extension includes the dot
+    """
+    dot = filename.rfind('.')
+    if 0 < dot < len(filename) - 1:
+        return filename[:dot], filename[dot:]
+    return filename, ""
+
 
-def generate_filename(path: str, date: str, caption: str) -> str:
+def generate_filename(filename: str, date: str, caption: str) -> str:
     """
     Generate new filename based on original name, date, and caption.
 
     Args:
-        path: Original file path
+        filename: Original filename (without directory)
         date: Date string in YYYYMMDD format
         caption: AI caption in lowercase
 
     Returns:
         New filename with format: YYYYMMDD_Caption_OriginalName.ext
     """
-    path_obj = Path(path)
-    original_name = path_obj.stem
-    extension = path_obj.suffix
+    original_name, extension = split_extension(filename)
     new_name = f"{date}_{caption}_{original_name}{extension}"
     return new_name
 
@@ -201,109 +644,141 @@ def is_already_renamed(filename: str) -> bool:
     Returns:
         True if file appears to be already renamed, False otherwise
     """
-    stem = Path(filename).stem
+    stem, _ = split_extension(filename)
+
     # Match: YYYYMMDD_Caption_OriginalFileName (allows spaces and common chars)
-    pattern = r'\d{8}_[A-Z][a-zA-Z0-9]*_.+$'
-    return bool(re.match(pattern, stem))
+    return bool(_RENAMED_RE.fullmatch(stem))
 
 
-def rename_video(
-    path: str,
-    dry_run: bool = False,
-    use_online: bool = False,
-    confirm: bool = False,
-) -> bool:
+def prepare_video(path: str, log: FileLog) -> Optional[str]:
     """
-    Rename a video file with date and AI caption.
+    Check whether a video file should be renamed and extract its date.
 
     Args:
         path: Path to the video file
-        dry_run: If True, only show what would be done without renaming
-        use_online: If True, load models from HuggingFace online
-        confirm: If True, prompt for confirmation before renaming
+        log: Log to add messages for the file to
 
     Returns:
-        True if successful, False otherwise
+        Date string in YYYYMMDD format, or None if the file should be skipped
     """
     if not os.path.exists(path):
-        print(
-            f"Error: File not found: {path}",
-            file=sys.stderr,
-        )
-        return False
+        log.error(f"Error: File not found: {path}")
+        return None
 
     # We don't want to rename files that are already in the correct format.
     filename = os.path.basename(path)
     if is_already_renamed(filename):
-        print(f"Skipping (already renamed): {filename}")
-        return False
+        log.info(f"Skipping (already renamed): {filename}")
+        return None
 
     # Extract the creation date so we can append it to the filename.
-    date_str = extract_creation_date(path)
+    date_str = extract_creation_date(path, log)
     if not date_str:
-        print(
-            f"Error: Could not extract date for {path}",
-            file=sys.stderr,
-        )
-        return False
+        log.error(f"Error: Could not extract date for {path}")
+        return None
+
+    return date_str
+
+
+def apply_rename(
+    path: str,
+    date_str: str,
+    full_caption: Optional[str],
+    log: FileLog,
+    dry_run: bool = False,
+    confirm: bool = False,
+) -> bool:
+    """
+    Rename a video file using an already extracted date and AI caption.
+
+    Args:
+        path: Path to the video file
+        date_str: Date string in YYYYMMDD format
+        full_caption: AI-generated caption, or None if generation failed
+        log: Log to add messages for the file to
+        dry_run: If True, only show what would be done without renaming
+        confirm: If True, prompt for confirmation before renaming
 
-    # Generate the AI caption so we can append it to the filename.
-    full_caption = generate_ai_caption(path, use_online=use_online)
+    Returns:
+        True if successful, False otherwise
+    """
     if not full_caption:
-        print(
-            f"Error: Could not generate caption for {path}",
-            file=sys.stderr,
-        )
+        log.error(f"Error: Could not generate caption for {path}")
         return False
 
     # Remove unwanted tokens and convert to PascalCase so the caption doesn't
     # make the filename too long.
-    caption = ""
-    caption_tokens = full_caption.split()
-    for token in caption_tokens:
-        # Strip punctuation from each token
-        clean_token = token.translate(str.maketrans('', '', string.punctuation))
-        if clean_token and clean_token not in TOKENS_TO_SKIP:
-            caption += clean_token.capitalize()
+    caption = to_pascal_case(full_caption)
 
     # Generate a new path using the new filename so we can rename the file.
-    directory = os.path.dirname(path)
-    new_filename = generate_filename(path, date_str, caption)
-    new_path = os.path.join(directory if directory else ".", new_filename)
+    # The path is split once and its parts are reused from here on.
+    directory, filename = os.path.split(path)
+    new_filename = generate_filename(filename, date_str, caption)
+    new_path = os.path.join(directory, new_filename)
 
     # Skip the file if it already exists to avoid overwriting unnecessarily.
     if os.path.exists(new_path) and new_path != path:
-        print(
-            f"Skipping (file already exists): {new_filename}",
-            file=sys.stderr,
-        )
+        log.error(f"Skipping (file already exists): {new_filename}")
         return False
-    
-    print(f"Renaming {filename} to {new_filename}", end="")
+
+    message = f"Renaming {filename} to {new_filename}"
 
     if dry_run:
-        print(" (dry-run)")
+        log.info(f"{message} (dry-run)")
     else:
         if confirm:
-            response = input(" Proceed? [y/n]: ").strip().lower()
+            # Write out the messages so far so they appear before the prompt.
+            log.flush()
+            response = input(f"{message} Proceed? [y/n]: ").strip().lower()
             if response != "y":
-                print("Skipped.")
+                log.info("Skipped.")
                 return False
         else:
-            print()
+            log.info(message)
 
         try:
             os.rename(path, new_path)
         except Exception as e:
-            print(
-                f"Error renaming {path}: {e}",
-                file=sys.stderr,
-            )
+            log.error(f"Error renaming {path}: {e}")
             return False
 
     return True
 
 
+def rename_video(
+    path: str,
+    dry_run: bool = False,
+    use_online: bool = False,
+    confirm: bool = False,
+) -> bool:
+    """
+    Rename a video file with date and AI caption.
+
+    Args:
+        path: Path to the video file
+        dry_run: If True, only show what would be done without renaming
+        use_online: If True, load models from HuggingFace online
+        confirm: If True, prompt for confirmation before renaming
+
+    Returns:
+        True if successful, False otherwise
+    """
+    log = FileLog()
+    try:
+        date_str = prepare_video(path, log)
+        if not date_str:
+            return False
+
+        # Generate the AI caption so we can append it to the filename.
+        full_caption = generate_ai_caption(path, log, use_online=use_online)
+
+        return apply_rename(
+            path, date_str, full_caption, log, dry_run, confirm
+        )
+    finally:
+        log.flush()
+
+
 def is_video_file(filename: str) -> bool:
     """
     Check if a file is a video file based on extension.
@@ -314,9 +789,58 @@ def is_video_file(filename: str) -> bool:
     Returns:
         True if file is a video, False otherwise
     """
-    
-    ext = Path(filename).suffix.lower()
-    return ext in VIDEO_EXTENSIONS
+    _, extension = split_extension(os.path.basename(filename))
+    return extension.lower() in VIDEO_EXTENSIONS
+
+
+def _load_frame(path: str, log: FileLog) -> Optional["Image.Image"]:
+    """
+    Load the first frame of a video that is ready to be captioned.
+
+    Args:
+        path: Path to the video file
+        log: Log to add messages for the file to
+
+    Returns:
+        First frame of the video, or None if the frame could not be read
+    """
+    pil_image = read_first_frame(path, log)
+    if pil_image is None:
+        log.error(f"Error: Could not generate caption for {path}")
+
+    return pil_image
+
+
+def _scan_video_files(directory: str, recursive: bool) -> Iterator[str]:
+    """
+    Yield the paths of video files in a directory.
+
+    Uses os.scandir so the file type returned with each directory entry can be
+    reused instead of making a separate stat call for every file.
+
+    Args:
+        directory: Directory path to scan
+        recursive: If True, scan subdirectories recursively
+
+    Yields:
+        Path to each video file found
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not recursive:
+                    continue
+
+                # Skip subdirectories we can't read, like os.walk does.
+                try:
+                    yield from _scan_video_files(entry.path, recursive)
+                except OSError as e:
+                    print(
+                        f"Error reading directory {entry.path}: {e}",
+                        file=sys.stderr,
+                    )
+            elif entry.is_file() and is_video_file(entry.name):
+                yield entry.path
 
 
 def process_directory(
@@ -325,6 +849,7 @@ def process_directory(
     dry_run: bool = False,
     use_online: bool = False,
     confirm: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
 ) -> Dict[str, int]:
     """
     Process all video files in a directory.
@@ -335,6 +860,7 @@ def process_directory(
         dry_run: If True, only show what would be done
         use_online: If True, load models from HuggingFace online
         confirm: If True, prompt for confirmation before renaming
+        batch_size: Number of videos to caption in a single model pass
 
     Returns:
         Dictionary with 'success' and 'failed' counts
@@ -349,19 +875,7 @@ def process_directory(
         return results
 
     # Obtain a list of video files from the directory so we can rename each one.
-    if recursive:
-        video_files = []
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if is_video_file(file):
-                    video_files.append(os.path.join(root, file))
-    else:
-        video_files = [
-            os.path.join(directory, f)
-            for f in os.listdir(directory)
-            if os.path.isfile(os.path.join(directory, f))
-            and is_video_file(f)
-        ]
+    video_files = list(_scan_video_files(directory, recursive))
 
     if not video_files:
         print(f"No video files found in {directory}")
@@ -370,11 +884,81 @@ def process_directory(
     print(f"Found {len(video_files)} video file(s)")
     print()
 
-    for video_file in video_files:
-        if rename_video(video_file, dry_run, use_online, confirm):
-            results["success"] += 1
-        else:
-            results["failed"] += 1
+    # Each file gets its own log that is written out in one go, so messages
+    # from files being processed on different threads don't get mixed up.
+    logs = [FileLog() for _ in video_files]
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        # Skip renamed files and files without a date before reading any frames
+        # so the model is never loaded for videos that can't be renamed.
+        candidates = []
+        for video_file, log, date_str in zip(
+            video_files, logs, executor.map(prepare_video, video_files, logs)
+        ):
+            if date_str:
+                candidates.append((video_file, date_str, log))
+            else:
+                results["failed"] += 1
+                log.flush()
+
+        # Only compile the model when there are enough videos for the faster
+        # batches to make up for the time spent compiling.
+        compile_model = len(candidates) >= COMPILE_MIN_VIDEOS
+
+        # Caption the videos in batches so the model processes several frames
+        # in a single pass rather than one frame at a time. Frames are loaded on
+        # the thread pool so the next batch is read from disk while the model is
+        # busy captioning the current one.
+        batches = [
+            candidates[start:start + batch_size]
+            for start in range(0, len(candidates), batch_size)
+        ]
+        pending = []
+        if batches:
+            import cv2
+
+            # Frames are decoded in parallel on the thread pool, so stop OpenCV
+            # from starting its own threads for each one and oversubscribing
+            # the CPU. This is a process wide setting, so it is set once here.
+            cv2.setNumThreads(1)
+
+            pending = [
+                executor.submit(_load_frame, video_file, log)
+                for video_file, _, log in batches[0]
+            ]
+        for index, batch in enumerate(batches):
+            frames = [future.result() for future in pending]
+            if index + 1 < len(batches):
+                pending = [
+                    executor.submit(_load_frame, video_file, log)
+                    for video_file, _, log in batches[index + 1]
+                ]
+
+            images = [frame for frame in frames if frame is not None]
+            captions = None
+            if images:
+                captions = generate_ai_captions(
+                    images,
+                    use_online=use_online,
+                    compile_model=compile_model,
+                )
+            if captions is None:
+                captions = [None] * len(images)
+            captions = iter(captions)
+
+            for (video_file, date_str, log), pil_image in zip(batch, frames):
+                if pil_image is not None and apply_rename(
+                    video_file,
+                    date_str,
+                    next(captions),
+                    log,
+                    dry_run,
+                    confirm,
+                ):
+                    results["success"] += 1
+                else:
+                    results["failed"] += 1
+                log.flush()
 
     return results
 
@@ -428,6 +1012,21 @@ def main():
         action="store_true",
         help="Prompt for confirmation before renaming each file",
     )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=(
+            "Number of videos to caption at once when processing a directory "
+            f"(default: {DEFAULT_BATCH_SIZE})"
+        ),
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Rebuild the cached AI model instead of loading it",
+    )
     args = parser.parse_args()
 
     if args.version:
@@ -440,6 +1039,13 @@ def main():
         parser.print_usage(sys.stderr)
         sys.exit(1)
 
+    if args.rebuild_cache:
+        clear_model_cache()
+
+    if args.batch_size < 1:
+        print("Error: Batch size must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+
     # Exit the script if the path doesn't exist as there is nothing to do.
     if not os.path.exists(args.path):
         print(
@@ -476,6 +1082,7 @@ def main():
             args.dry_run,
             use_online=args.init,
             confirm=args.confirm,
+            batch_size=args.batch_size,
         )
 
         print("=" * 50)